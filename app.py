@@ -1,7 +1,10 @@
 import os
-from collections import defaultdict
-import math
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Iterator
 import gradio as gr
+import numpy as np
 import pandas as pd
 # from typing import Tuple, List
 
@@ -16,24 +19,25 @@ def parse_model_names(cache_dir: str) -> dict[str, list[str]]:
     Returns:
         Dictionary mapping organizations to their models
     """
-    models_by_org = defaultdict(list)
+    models_by_org: dict[str, list[str]] = {}
 
     # List all directories in cache
-    for item in os.listdir(cache_dir):
-        if item.startswith("models--"):
-            # Split the model name into components
-            parts = item.split("--")
-            if len(parts) >= 3:
-                org = parts[1]
-                model = parts[2]
-                models_by_org[org].append(model)
+    with os.scandir(cache_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            if not name.startswith("models--"):
+                continue
+            # Split the remainder into organization and model
+            org, sep, model = name[len("models--") :].partition("--")
+            if sep:
+                models_by_org.setdefault(org, []).append(model)
 
-    return dict(models_by_org)
+    return models_by_org
 
 
-def get_directory_size(path: str) -> int:
+def _scan_directory_size(path: str) -> int:
     """
-    Calculate the total size of a directory in bytes.
+    Walk a directory and sum the sizes of its regular files in bytes.
 
     Args:
         path: Path to the directory
@@ -42,14 +46,85 @@ def get_directory_size(path: str) -> int:
         Total size in bytes
     """
     total_size = 0
-    for dirpath, dirnames, filenames in os.walk(path):
-        for filename in filenames:
-            file_path = os.path.join(dirpath, filename)
-            if not os.path.islink(file_path):  # Skip symbolic links
-                total_size += os.path.getsize(file_path)
+    # Iterative scandir walk; DirEntry caches the file type so only sizes need a stat call
+    stack = [path]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:  # Skip unreadable or vanished directories, as os.walk does
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_symlink():  # Skip symbolic links
+                    continue
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        total_size += entry.stat(follow_symlinks=False).st_size
+                    elif entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                except OSError:  # File removed mid-scan
+                    continue
     return total_size
 
 
+@lru_cache(maxsize=4096)
+def _cached_directory_size(path: str, mtime_ns: int) -> int:
+    """
+    Memoize directory sizes keyed by the directory's own mtime.
+
+    The mtime only changes when entries are added to or removed from that directory itself, not
+    when files in nested subdirectories change, so a cached size can stay stale until the
+    directory's top-level entries change.
+    """
+    return _scan_directory_size(path)
+
+
+@lru_cache(maxsize=4096)
+def _cached_model_size(path: str, blobs_mtime_ns: int) -> int:
+    """
+    Memoize the size of a Hugging Face cache entry keyed by the mtime of its blobs/ directory.
+
+    Every download and every pruned revision adds or removes an entry in blobs/, including
+    downloads that are then moved into snapshots/ when symlinks are unavailable.
+    """
+    return _scan_directory_size(os.path.join(path, "blobs")) + _scan_directory_size(os.path.join(path, "snapshots"))
+
+
+def get_directory_size(path: str) -> int:
+    """
+    Calculate the total size of a directory in bytes.
+
+    Results are cached so unchanged directories are not rescanned on refresh.
+    Hugging Face cache entries are assumed to store file contents under ``blobs/`` and in
+    ``snapshots/``: normally snapshots only hold symlinks to the blobs, which are skipped, but
+    without symlink support (e.g. Windows without developer mode) the files are moved into
+    ``snapshots/`` as regular files and counted there. ``refs/`` only holds commit hashes and is
+    not counted.
+
+    Args:
+        path: Path to the directory
+
+    Returns:
+        Total size in bytes, or 0 if the directory cannot be read
+    """
+    blobs_dir = os.path.join(path, "blobs")
+    try:
+        if os.path.isdir(blobs_dir):
+            return _cached_model_size(path, os.stat(blobs_dir).st_mtime_ns)
+        return _cached_directory_size(path, os.stat(path).st_mtime_ns)
+    except OSError:  # Broken symlink, stray file or directory removed mid-scan
+        return 0
+
+
+BYTES_PER_GB = 1024**3
+
+# Placeholder shown for sizes that have not been calculated yet
+SIZE_PENDING = "Calculating..."
+
+# Raw size recorded for models that have not been sized yet
+RAW_SIZE_PENDING = -1
+
+
 def format_size(size_bytes: int) -> str:
     """
     Format size in bytes to GB.
@@ -63,65 +138,235 @@ def format_size(size_bytes: int) -> str:
     if size_bytes == 0:
         return "0 GB"
 
-    size_gb = size_bytes / (1024**3)  # Convert to GB
+    size_gb = size_bytes / BYTES_PER_GB
     return f"{size_gb:.2f} GB"
 
 
-def get_models_data() -> tuple[pd.DataFrame, str]:
+def format_sizes(sizes_bytes: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of format_size for an array of byte counts.
+
+    Negative values mark sizes that have not been calculated yet.
+
+    Args:
+        sizes_bytes: Array of sizes in bytes
+
+    Returns:
+        Array of formatted strings in GB
+    """
+    # Round to hundredths of a GB with integer arithmetic, avoiding per-element float formatting.
+    # Exact ties round half to even, like the "%.2f" formatting in format_size.
+    hundredths, remainder = np.divmod(sizes_bytes * 100, BYTES_PER_GB)
+    hundredths += (2 * remainder > BYTES_PER_GB) | ((2 * remainder == BYTES_PER_GB) & (hundredths % 2 == 1))
+    whole = (hundredths // 100).astype(str)
+    formatted = np.char.add(whole, np.char.mod(".%02d GB", hundredths % 100))
+    formatted = np.where(sizes_bytes == 0, "0 GB", formatted)
+    return np.where(sizes_bytes < 0, SIZE_PENDING, formatted)
+
+
+def format_table(df: pd.DataFrame, raw_sizes: np.ndarray) -> pd.DataFrame:
     """
-    Get models data as a pandas DataFrame and total size.
+    Build the displayed table for a (possibly filtered) set of models.
+
+    Sizes are formatted here so only the rows being shown pay for it.
+
+    Args:
+        df: DataFrame with "Organization" and "Model" columns
+        raw_sizes: Sizes in bytes aligned with the rows of df
 
     Returns:
-        Tuple of (DataFrame with model info, total size string)
+        DataFrame with "Organization", "Model" and formatted "Size" columns
     """
+    table = df[["Organization", "Model"]].copy()
+    table["Size"] = format_sizes(raw_sizes)
+    return table
+
+
+# Models DataFrame ("Organization" and "Model"), raw sizes aligned with its rows,
+# organization to row positions mapping and total size string
+ModelsData = tuple[pd.DataFrame, np.ndarray, dict[str, np.ndarray], str]
+
+# Minimum seconds between partial results streamed while sizing
+STREAM_INTERVAL = 0.5
+
+# Last computed models data and the (hub directory, mtime) signature it was computed for
+_last_models_data = {"signature": None, "value": None}
+
+
+def get_models_list() -> tuple[pd.DataFrame, np.ndarray, dict[str, np.ndarray]]:
+    """
+    Get the cached models without sizing them, for a fast initial view.
+
+    Returns:
+        Tuple of (DataFrame with model info, pending raw sizes, organization to row positions mapping)
+    """
+    huggingface_hub_cache_dir = _get_hub_cache_dir()
+    df, org_index, _ = _make_models_frame(_get_model_tasks(huggingface_hub_cache_dir))
+    return df, np.full(len(df), RAW_SIZE_PENDING, dtype=np.int64), org_index
+
+
+def iter_models_data(force: bool = False) -> Iterator[ModelsData]:
+    """
+    Incrementally get models data, yielding partial sizes at most every STREAM_INTERVAL seconds.
+
+    Models are added to or removed from the hub directory as subdirectories, so while its mtime is
+    unchanged the last result is yielded as is without rescanning. Downloads into or revisions pruned
+    from a model that is already cached do not change that mtime, so callers that need them pass
+    force; the per-directory size cache keeps such a rescan cheap.
+
+    Args:
+        force: Rescan even if the hub directory is unchanged
+
+    Yields:
+        Tuple of (DataFrame with model info, raw sizes, organization to row positions mapping, total size string);
+        the last one has every size filled in
+    """
+    huggingface_hub_cache_dir = _get_hub_cache_dir()
+
+    signature = (huggingface_hub_cache_dir, os.stat(huggingface_hub_cache_dir).st_mtime_ns)
+    if not force and _last_models_data["signature"] == signature:
+        yield _last_models_data["value"]
+        return
+
+    for value in _iter_models_data(huggingface_hub_cache_dir):
+        yield value
+    _last_models_data.update(signature=signature, value=value)
+
+
+def _get_hub_cache_dir() -> str:
+    """Return the Hugging Face hub cache directory, honoring HF_HOME"""
     cache_dir = os.getenv("HF_HOME", os.path.expanduser("~/.cache/huggingface"))
-    huggingface_hub_cache_dir = cache_dir + "/hub"
+    return cache_dir + "/hub"
+
 
+def _get_model_tasks(huggingface_hub_cache_dir: str) -> list[tuple[str, str, str]]:
+    """
+    List the cached models as (organization, model, directory) tuples.
+
+    Args:
+        huggingface_hub_cache_dir: Path to the Hugging Face hub cache directory
+
+    Returns:
+        List of (organization, model, model directory) tuples
+    """
     # Get models organized by organization
     models = parse_model_names(huggingface_hub_cache_dir)
 
-    # Prepare data for DataFrame
-    data = []
-    total_size = 0
+    return [
+        (org, model, os.path.join(huggingface_hub_cache_dir, f"models--{org}--{model}"))
+        for org, model_list in models.items()
+        for model in model_list
+    ]
 
-    for org, model_list in sorted(models.items()):
-        for model in sorted(model_list):
-            model_dir = os.path.join(huggingface_hub_cache_dir, f"models--{org}--{model}")
-            size = get_directory_size(model_dir)
-            total_size += size
-            data.append(
-                {
-                    "Organization": org,
-                    "Model": model,
-                    "Size": format_size(size),
-                    "Raw Size": size,  # For sorting
-                }
-            )
 
-    df = pd.DataFrame(data)
-    return df, format_size(total_size)
+def _iter_models_data(huggingface_hub_cache_dir: str) -> Iterator[ModelsData]:
+    """
+    Scan the hub cache directory, yielding partial sizes at most every STREAM_INTERVAL seconds.
 
+    The DataFrame and organization index are built once; only the raw sizes change between yields.
+
+    Args:
+        huggingface_hub_cache_dir: Path to the Hugging Face hub cache directory
+
+    Yields:
+        Tuple of (DataFrame with model info, raw sizes, organization to row positions mapping, total size string);
+        the last one has every size filled in
+    """
+    tasks = _get_model_tasks(huggingface_hub_cache_dir)
+    df, org_index, task_rows = _make_models_frame(tasks)
+    raw_sizes = np.full(len(tasks), RAW_SIZE_PENDING, dtype=np.int64)
+
+    # Size each model directory concurrently; the work is I/O bound
+    executor = ThreadPoolExecutor(max_workers=min(32, len(tasks) or 1))
+    try:
+        futures = {executor.submit(get_directory_size, task[2]): row for task, row in zip(tasks, task_rows)}
+
+        last_yield = time.monotonic()
+        for future in as_completed(futures):
+            raw_sizes[futures[future]] = future.result()
+            now = time.monotonic()
+            if now - last_yield >= STREAM_INTERVAL:
+                last_yield = now
+                yield df, raw_sizes.copy(), org_index, format_size(int(raw_sizes.clip(min=0).sum()))
+    finally:
+        # If the consumer stops early (e.g. the client disconnects), drop the queued scans instead of
+        # blocking on them
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    yield df, raw_sizes, org_index, format_size(int(raw_sizes.sum()))
+
+
+def _make_models_frame(
+    tasks: list[tuple[str, str, str]],
+) -> tuple[pd.DataFrame, dict[str, np.ndarray], np.ndarray]:
+    """
+    Build the sorted models DataFrame and organization index for the given tasks.
 
-def filter_models(organization: str, df: pd.DataFrame) -> pd.DataFrame:
-    """Filter models by organization"""
+    Args:
+        tasks: (organization, model, directory) tuples
+
+    Returns:
+        Tuple of (DataFrame with model info, organization to row positions mapping, row position of each task)
+    """
+    # Sizes are kept in a separate array and formatted on demand by format_table
+    df = pd.DataFrame(
+        {
+            "Organization": [task[0] for task in tasks],
+            "Model": [task[1] for task in tasks],
+        }
+    ).astype({"Organization": "category", "Model": "string"})
+    # Sort once in pandas; Organization compares by category code
+    df = df.sort_values(["Organization", "Model"])
+
+    task_rows = np.empty(len(df), dtype=np.intp)
+    task_rows[df.index.to_numpy()] = np.arange(len(df))
+    df = df.reset_index(drop=True)
+
+    # Row positions per organization, so filtering is a take instead of a string scan
+    org_index = df.groupby("Organization", sort=False, observed=True).indices
+    return df, org_index, task_rows
+
+
+def filter_models(
+    organization: str, df: pd.DataFrame, raw_sizes: np.ndarray, org_index: dict[str, np.ndarray]
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """Filter models and their raw sizes by organization"""
     if organization == "All Organizations":
-        return df
-    return df[df["Organization"] == organization]
+        return df, raw_sizes
+    rows = org_index.get(organization, np.empty(0, dtype=np.intp))
+    return df.iloc[rows], raw_sizes[rows]
 
 
 def create_interface():
-    # Get initial data
-    df, total_size = get_models_data()
+    # List models immediately; sizes are filled in by the streaming refresh on page load
+    df, raw_sizes, org_index = get_models_list()
+    total_size = SIZE_PENDING
+
+    def stream_data(force: bool):
+        # Stream partial results so sizes fill in while the scan runs. Only state and totals are
+        # streamed; the table is re-rendered from the state for the currently selected organization,
+        # and the dropdown choices are only replaced once every size is known.
+        for new_df, new_raw_sizes, new_org_index, new_total in iter_models_data(force):
+            complete = not (new_raw_sizes == RAW_SIZE_PENDING).any()
+            yield (
+                new_df,
+                new_raw_sizes,
+                new_org_index,
+                new_total,
+                gr.update(choices=["All Organizations"] + sorted(new_org_index)) if complete else gr.update(),
+            )
+
+    def load_data():
+        yield from stream_data(force=False)
 
     def refresh_data():
-        new_df, new_total = get_models_data()
-        orgs = ["All Organizations"] + sorted(new_df["Organization"].unique().tolist())
-        return new_df, new_total, gr.Dropdown(choices=orgs, value="All Organizations")
+        # An explicit refresh rescans every model; unchanged model directories are served from the size cache
+        yield from stream_data(force=True)
 
-    def update_table(org: str, df: pd.DataFrame):
-        filtered_df = filter_models(org, df)
-        org_total = format_size(filtered_df["Raw Size"].sum())
-        return filtered_df[["Organization", "Model", "Size"]], org_total
+    def update_table(org: str, df: pd.DataFrame, raw_sizes: np.ndarray, org_index: dict[str, np.ndarray]):
+        filtered_df, filtered_raw_sizes = filter_models(org, df, raw_sizes, org_index)
+        org_total = format_size(int(filtered_raw_sizes.clip(min=0).sum()))
+        return format_table(filtered_df, filtered_raw_sizes), org_total
 
     with gr.Blocks(title="Hugging Face Model Cache Viewer") as interface:
         gr.Markdown("# 🤗 Hugging Face Model Cache Viewer")
@@ -131,29 +376,37 @@ def create_interface():
                 refresh_btn = gr.Button("🔄 Refresh Data", variant="primary")
                 total_size_text = gr.Textbox(label="Total Cache Size", value=total_size, interactive=False)
                 org_dropdown = gr.Dropdown(
-                    choices=["All Organizations"] + sorted(df["Organization"].unique().tolist()),
+                    choices=["All Organizations"] + sorted(org_index),
                     value="All Organizations",
                     label="Filter by Organization",
                 )
                 org_size_text = gr.Textbox(label="Selected Organization(s) Size", value=total_size, interactive=False)
 
         table = gr.DataFrame(
-            value=df[["Organization", "Model", "Size"]],
+            value=format_table(df, raw_sizes),
             headers=["Organization", "Model", "Size"],
             datatype=["str", "str", "str"],
             col_count=(3, "fixed"),
             interactive=False,
         )
 
-        # Hidden state for the full DataFrame
+        # Hidden state for the display columns, raw sizes and organization index
         state = gr.State(df)
+        raw_sizes_state = gr.State(raw_sizes)
+        org_index_state = gr.State(org_index)
 
         # Set up event handlers
-        refresh_btn.click(refresh_data, outputs=[state, total_size_text, org_dropdown]).then(
-            update_table, inputs=[org_dropdown, state], outputs=[table, org_size_text]
-        )
+        refresh_outputs = [state, raw_sizes_state, org_index_state, total_size_text, org_dropdown]
+        update_inputs = [org_dropdown, state, raw_sizes_state, org_index_state]
+
+        refresh_btn.click(refresh_data, outputs=refresh_outputs, queue=True)
+
+        # Every streamed result carries a new raw sizes array; re-render it for the current selection
+        raw_sizes_state.change(update_table, inputs=update_inputs, outputs=[table, org_size_text])
+
+        org_dropdown.change(update_table, inputs=update_inputs, outputs=[table, org_size_text])
 
-        org_dropdown.change(update_table, inputs=[org_dropdown, state], outputs=[table, org_size_text])
+        interface.load(load_data, outputs=refresh_outputs)
 
     return interface
 